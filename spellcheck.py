@@ -15,10 +15,11 @@
 # General Public License for more details.
 
 import weechat
-import re
 import subprocess
 import os
-import tempfile
+import shutil
+import functools
+import threading
 
 SCRIPT_NAME = "spellcheck"
 SCRIPT_AUTHOR = "Original by Jakub Wilk, Jakub Jankowski, Gabriel Pettier, Nei. Ported to WeeChat by yooz"
@@ -28,81 +29,281 @@ SCRIPT_DESC = "Checks for spelling errors using Aspell"
 
 # Zmienne globalne
 spellers = {}
+installed_dicts = None  # zbiór słowników z "aspell dump dicts" (False gdy niedostępny)
+ASPELL_PROCESS_TIMEOUT = 10000  # limit czasu (ms) dla asynchronicznego aspell
+_pending_suggest = {}  # identyfikator żądania -> dane oczekującego /spellcheck_suggest
+_suggest_request_id = 0
+_spellers_lock = threading.Lock()  # chroni spellers i installed_dicts przed wątkiem wczytującym
 suggestion_buffer = None
+_input_hook = None  # hook modyfikatora input_text_display (None gdy wyłączony)
+_enabled_bool = False
+_debug = False
+_cfg = {}  # kopia opcji skryptu, aktualizowana przez config_cb
+_color_word = ""  # kod koloru dla błędnych słów
+_color_reset = ""
+_color_error = ""  # kod koloru dla komunikatów o błędach
+
+_TRIGGER_CHARS = frozenset(" .?!")  # znaki kończące słowo, po których sprawdzamy pisownię
+_cmd_prefix_tuple = ("/",)  # znaki komend dla str.startswith (odświeżane z command_chars)
+
+_langs_cache = {}  # "lang1+lang2" -> lista przygotowanych języków
+_personal_sets = {}  # język -> zbiór słów z osobistego słownika
+_known_good = {}  # język -> zbiór słów uznanych za poprawne
+KNOWN_GOOD_MAX = 10000  # maksymalny rozmiar zbioru dla jednego języka
+_EMPTY_SET = frozenset()
+_lang_cache = {}  # wskaźnik bufora -> język
+_lang_rules_cache = {"raw": None, "maps": ({}, {})}  # sparsowane ustawienie languages
+
+# Znaki ASCII spoza \w - do szybkiego usuwania interpunkcji przez lstrip/rstrip
+_PUNCT = ''.join(chr(c) for c in range(128) if not chr(c).isalnum() and chr(c) != '_')
 
 def debug_print(message):
-    """Funkcja pomocnicza do wyświetlania komunikatów debugowania."""
-    if weechat.config_get_plugin("debug") == "1":
-        weechat.prnt("", f"DEBUG: {message}")
+    """Funkcja pomocnicza do wyświetlania komunikatów debugowania (wywołuj pod if _debug:)."""
+    weechat.prnt("", f"DEBUG: {message}")
 
 def aspell_check_is_installed():
     """Sprawdzanie czy aspell jest zainstalowany w systemie."""
+    return shutil.which("aspell") is not None
+
+def _read_aspell_dicts():
+    """Odczytuje listę zainstalowanych słowników aspell (bez użycia API WeeChat)."""
     try:
-        result = subprocess.run(["aspell", "--version"], 
-                             stdout=subprocess.PIPE, 
-                             stderr=subprocess.PIPE, 
-                             check=False)
-        return result.returncode == 0
-    except (subprocess.SubprocessError, FileNotFoundError):
+        process = subprocess.run(
+            ["aspell", "dump", "dicts"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False
+        )
+    except (subprocess.SubprocessError, OSError):
         return False
+    if process.returncode != 0:
+        return False
+    return set(process.stdout.split())
+
+def aspell_list_dicts():
+    """Zwraca zbiór zainstalowanych słowników aspell (odczytywany raz, wspólny dla wszystkich języków)."""
+    global installed_dicts
+    
+    with _spellers_lock:
+        dicts = installed_dicts
+    if dicts is None:
+        dicts = _read_aspell_dicts()
+        with _spellers_lock:
+            installed_dicts = dicts
+    return dicts
+
+def _preload_dicts(langs):
+    """Przygotowuje słowniki w wątku w tle, aby nie blokować pierwszego sprawdzenia.
+    
+    Wątek nie może wywoływać API WeeChat - błędy zgłosi później aspell_setup.
+    """
+    dicts = aspell_list_dicts()
+    if not dicts:
+        return
+    for lang in langs:
+        if lang in dicts:
+            proc = _start_aspell(lang)
+            with _spellers_lock:
+                speller = spellers.setdefault(lang, {'lang': lang, 'proc': None})
+                if speller is not None and speller['proc'] is None:
+                    speller['proc'] = proc
+                    proc = None
+            if proc is not None:
+                _stop_aspell(proc)  # Ktoś zdążył uruchomić proces wcześniej
+
+def start_preload():
+    """Uruchamia w tle przygotowanie słowników dla skonfigurowanych języków, które nie są jeszcze gotowe."""
+    preload_langs = set(_cfg["default_language"].split("+"))
+    for lang_map in get_language_maps():
+        for langs in lang_map.values():
+            preload_langs.update(langs.split("+"))
+    with _spellers_lock:
+        preload_langs.difference_update(spellers)
+    if preload_langs:
+        threading.Thread(target=_preload_dicts, args=(preload_langs,), daemon=True).start()
 
 def aspell_setup(lang):
     """Inicjalizacja sprawdzania pisowni dla danego języka."""
-    if lang in spellers:
-        return spellers[lang]
+    with _spellers_lock:
+        if lang in spellers:
+            return spellers[lang]  # None - wcześniejsza próba się nie powiodła
     
     # Sprawdź czy słownik językowy istnieje
     try:
-        process = subprocess.run(
-            ["aspell", "-d", lang, "dump", "config"], 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True,
-            check=False
-        )
-        if process.returncode != 0:
-            weechat.prnt("", weechat.color("red") + f"Error: Language dictionary for {lang} not found" + weechat.color("reset"))
+        dicts = aspell_list_dicts()
+        if dicts:
+            found = lang in dicts
+        else:
+            # Nie udało się pobrać listy słowników - sprawdź język osobno
+            process = subprocess.run(
+                ["aspell", "-d", lang, "dump", "config"], 
+                stdout=subprocess.PIPE, 
+                stderr=subprocess.PIPE, 
+                text=True,
+                check=False
+            )
+            found = process.returncode == 0
+        if not found:
+            _mark_setup_failed(lang)
             return None
         
-        # Zapisz informacje o konfiguracji spellera
-        spellers[lang] = {
-            'lang': lang
-        }
-        return spellers[lang]
+        # Zapisz informacje o konfiguracji spellera (proces aspell uruchamiany przy pierwszym użyciu)
+        with _spellers_lock:
+            return spellers.setdefault(lang, {'lang': lang, 'proc': None})
     except subprocess.SubprocessError as e:
-        weechat.prnt("", weechat.color("red") + f"Error setting up aspell for {lang}: {e}" + weechat.color("reset"))
+        # Błąd może być przejściowy - nie zapamiętuj go, spróbuj ponownie przy następnym użyciu
+        weechat.prnt("", _color_error + f"Error setting up aspell for {lang}: {e}" + _color_reset)
         return None
 
+def _mark_setup_failed(lang):
+    """Zapamiętuje brak słownika dla języka, aby nie uruchamiać aspell przy każdym słowie (zgłasza go raz)."""
+    with _spellers_lock:
+        if lang in spellers:
+            return
+        spellers[lang] = None
+    weechat.prnt("", _color_error + f"Error: Language dictionary for {lang} not found" + _color_reset)
+
+def forget_failed_setups():
+    """Zapomina języki bez słownika, aby przy następnym użyciu sprawdzić je ponownie."""
+    global installed_dicts
+    
+    with _spellers_lock:
+        failed = [lang for lang, speller in spellers.items() if speller is None]
+        for lang in failed:
+            del spellers[lang]
+        if failed:
+            installed_dicts = None  # Słownik mógł zostać doinstalowany - odczytaj listę ponownie
+
+def _start_aspell(lang):
+    """Uruchamia stały proces "aspell -a" dla języka (bez użycia API WeeChat)."""
+    try:
+        proc = subprocess.Popen(
+            ["aspell", "-a", "--lang=" + lang, "--encoding=utf-8"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            bufsize=1
+        )
+        # Pomiń nagłówek z wersją i włącz tryb zwięzły (bez "*" dla poprawnych słów)
+        if not proc.stdout.readline():
+            _stop_aspell(proc)
+            return None
+        proc.stdin.write("!\n")
+        proc.stdin.flush()
+        return proc
+    except (subprocess.SubprocessError, OSError):
+        return None
+
+def _stop_aspell(proc):
+    """Kończy proces aspell."""
+    try:
+        proc.stdin.close()
+        proc.terminate()
+        proc.wait(timeout=1)
+    except (subprocess.SubprocessError, OSError):
+        pass
+
+def _aspell_pipe(speller):
+    """Zwraca działający proces aspell dla spellera, w razie potrzeby uruchamiając go."""
+    with _spellers_lock:
+        proc = speller['proc']
+    if proc is not None and proc.poll() is None:
+        return proc
+    
+    # Proces jeszcze nie działa albo zakończył się - uruchom go ponownie
+    new_proc = _start_aspell(speller['lang'])
+    with _spellers_lock:
+        current = speller['proc']
+        if current is not None and current is not proc and current.poll() is None:
+            # Wątek wczytujący zdążył uruchomić własny proces
+            if new_proc is not None:
+                _stop_aspell(new_proc)
+            return current
+        speller['proc'] = new_proc
+    return new_proc
+
+def _aspell_exchange(speller, word):
+    """Jedna transakcja z procesem aspell: zapis słowa, potem odczyt odpowiedzi."""
+    # "^" sprawia, że aspell traktuje linię dosłownie, a nie jako polecenie
+    request = "^" + word + "\n"
+    
+    for attempt in range(2):
+        proc = _aspell_pipe(speller)
+        if proc is None:
+            return None
+        
+        try:
+            proc.stdin.write(request)
+            proc.stdin.flush()
+            
+            # Odpowiedź kończy się pustą linią
+            lines = []
+            while True:
+                line = proc.stdout.readline()
+                if not line:
+                    raise BrokenPipeError("aspell closed its output")
+                line = line.rstrip("\n")
+                if not line:
+                    return lines
+                lines.append(line)
+        except OSError as e:
+            if _debug:
+                debug_print(f"Aspell pipe for {speller['lang']} failed: {e}")
+            _stop_aspell(proc)
+            with _spellers_lock:
+                if speller['proc'] is proc:
+                    speller['proc'] = None
+    return None
+
+def aspell_query(lang, word):
+    """Wysyła słowo do procesu "aspell -a" i zwraca linie odpowiedzi (None w razie błędu)."""
+    speller = aspell_setup(lang)
+    if not speller:
+        return None
+    return _aspell_exchange(speller, word)
+
+def aspell_parse_reply(reply):
+    """Zamienia odpowiedź aspell na None (słowo poprawne) lub listę sugestii."""
+    for line in reply:
+        if line.startswith("&"):
+            # Format: "& word count offset: sugg1, sugg2..."
+            suggestions_part = line.split(":", 1)
+            if len(suggestions_part) > 1:
+                return [s.strip() for s in suggestions_part[1].split(",")]
+            return []
+        if line.startswith("#"):
+            return []  # Słowo błędne, brak sugestii
+    return None
+
+def aspell_shutdown_cb():
+    """Kończy procesy aspell przy wyładowaniu skryptu."""
+    with _spellers_lock:
+        procs = [speller['proc'] for speller in spellers.values() if speller and speller['proc'] is not None]
+        spellers.clear()
+    for proc in procs:
+        _stop_aspell(proc)
+    return weechat.WEECHAT_RC_OK
+
 def aspell_check_word(lang, word):
-    """Sprawdza pisownię słowa używając Aspell poprzez plik tymczasowy dla większej niezawodności."""
+    """Sprawdza pisownię słowa używając stałego procesu "aspell -a".
+    
+    Zwraca True (poprawne), False (błędne) lub None, gdy aspell zawiódł.
+    """
     if not word or len(word) < 2:
         return True
     
     try:
-        # Użyj pliku tymczasowego zamiast stdin, aby uniknąć problemów z buforowaniem
-        with tempfile.NamedTemporaryFile(mode='w+', delete=False) as temp:
-            temp.write(word + '\n')
-            temp_path = temp.name
-        
-        # Uruchom aspell z plikiem wejściowym
-        process = subprocess.run(
-            ["aspell", "--lang="+lang, "list"],
-            input=word + "\n",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False
-        )
+        result = aspell_query(lang, word)
+        if result is None:
+            return None  # Błąd komunikacji z aspell
         
-        # Wynik: jeśli słowo jest niepoprawne, aspell wypisuje je na stdout
-        # Jeśli jest poprawne, aspell nie wypisuje nic
-        result = process.stdout.strip()
+        # W trybie zwięzłym poprawne słowa nie dają wyniku,
+        # błędne zaczynają się od "&" (z sugestiami) lub "#" (bez sugestii)
+        is_correct = aspell_parse_reply(result) is None
         
-        # Jeśli wynik jest pusty, słowo jest poprawne
-        # Jeśli wynik zawiera słowo, słowo jest niepoprawne
-        is_correct = not result
-        
-        if weechat.config_get_plugin("debug") == "1":
+        if _debug:
             debug_print(f"Checking word '{word}' in {lang}: {'correct' if is_correct else 'incorrect'}")
             if not is_correct:
                 debug_print(f"Aspell output: '{result}'")
@@ -110,151 +311,332 @@ def aspell_check_word(lang, word):
         return is_correct
     
     except Exception as e:
-        weechat.prnt("", weechat.color("red") + f"Error checking word with aspell: {e}" + weechat.color("reset"))
-        return True  # W razie błędu zakładamy, że słowo jest poprawne
+        weechat.prnt("", _color_error + f"Error checking word with aspell: {e}" + _color_reset)
+        return None
 
 def aspell_get_suggestions(lang, word):
-    """Pobiera sugestie dla niepoprawnego słowa."""
+    """Pobiera sugestie dla niepoprawnego słowa (None, gdy aspell zawiódł)."""
     try:
-        # Używamy 'pipe' mode z opcją -a
-        process = subprocess.run(
-            ["aspell", "-a", "-d", lang],
-            input=f"{word}\n",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False
-        )
-        
-        if process.returncode != 0:
-            debug_print(f"Aspell error: {process.stderr}")
-            return []
-        
-        output = process.stdout.strip().split("\n")
+        result = aspell_query(lang, word)
+        if result is None:
+            return None
         
-        # W trybie pipe, pierwsza linia to informacja o wersji
-        # Druga linia zawiera wynik sprawdzania
-        if len(output) > 1:
-            result = output[1]
-            if result.startswith("&"):
-                # Format: "& word #count: sugg1, sugg2..."
-                suggestions_part = result.split(":", 1)
-                if len(suggestions_part) > 1:
-                    suggestions = [s.strip() for s in suggestions_part[1].split(",")]
-                    debug_print(f"Suggestions for '{word}': {suggestions}")
-                    return suggestions
+        suggestions = aspell_parse_reply(result)
+        if suggestions:
+            if _debug:
+                debug_print(f"Suggestions for '{word}': {suggestions}")
+            return suggestions
         
-        debug_print(f"No suggestions for '{word}'")
+        if _debug:
+            debug_print(f"No suggestions for '{word}'")
         return []
     except Exception as e:
-        weechat.prnt("", weechat.color("red") + f"Error getting suggestions with aspell: {e}" + weechat.color("reset"))
-        return []
+        weechat.prnt("", _color_error + f"Error getting suggestions with aspell: {e}" + _color_reset)
+        return None
 
-def aspell_add_word(lang, word):
-    """Dodaje słowo do osobistego słownika aspell."""
+class AspellError(Exception):
+    """Błąd aspell - zgłaszany zamiast wyniku, aby lru_cache go nie zapamiętał."""
+
+@functools.lru_cache(maxsize=4096)
+def _check_cached(lang, word):
+    """Zapamiętywany wynik aspell_check_word dla (język, słowo)."""
+    is_correct = aspell_check_word(lang, word)
+    if is_correct is None:
+        raise AspellError(f"cannot check '{word}' in {lang}")
+    return is_correct
+
+@functools.lru_cache(maxsize=1024)
+def _suggestions_cached(lang, word):
+    """Zapamiętywany wynik aspell_get_suggestions dla (język, słowo)."""
+    suggestions = aspell_get_suggestions(lang, word)
+    if suggestions is None:
+        raise AspellError(f"cannot get suggestions for '{word}' in {lang}")
+    return tuple(suggestions)
+
+def _personal_path(lang):
+    """Ścieżka osobistego słownika aspell dla języka."""
+    return os.path.expanduser(f"~/.aspell.{lang}.pws")
+
+def _load_personal(lang):
+    """Zwraca zbiór słów z osobistego słownika (plik czytany tylko raz)."""
+    words = _personal_sets.get(lang)
+    if words is None:
+        words = set()
+        personal_path = _personal_path(lang)
+        try:
+            if os.path.exists(personal_path):
+                with open(personal_path, 'r') as f:
+                    next(f, None)  # Pomiń nagłówek "personal_ws-1.1 ..."
+                    words.update(line.strip() for line in f if line.strip())
+        except OSError as e:
+            if _debug:
+                debug_print(f"Cannot read personal dictionary {personal_path}: {e}")
+        _personal_sets[lang] = words
+    return words
+
+def aspell_accept_word(lang, word):
+    """Informuje działający proces aspell o nowym słowie (plik .pws czyta tylko przy starcie)."""
+    with _spellers_lock:
+        speller = spellers.get(lang)
+        proc = speller['proc'] if speller else None
+    if proc is None or proc.poll() is not None:
+        return
+    try:
+        # "@" - zaakceptuj słowo do końca sesji (aspell nic nie odpowiada)
+        proc.stdin.write("@" + word + "\n")
+        proc.stdin.flush()
+    except OSError as e:
+        if _debug:
+            debug_print(f"Cannot pass word '{word}' to aspell for {lang}: {e}")
+
+def aspell_add_words(lang, words):
+    """Dodaje słowa do osobistego słownika aspell jednym dopisaniem do pliku."""
     try:
-        # Dodaj słowo za pomocą komendy osobistego słownika
-        personal_path = os.path.expanduser(f"~/.aspell.{lang}.pws")
+        # Pomiń słowa, które już są w słowniku (także powtórzone w argumentach)
+        existing = _load_personal(lang)
+        to_add = [word for word in dict.fromkeys(words) if word not in existing]
+        if not to_add:
+            return True
+        
+        # Dodaj słowa za pomocą komendy osobistego słownika
+        personal_path = _personal_path(lang)
         
         # Sprawdź czy plik istnieje, jeśli nie - utwórz go
         if not os.path.exists(personal_path):
             with open(personal_path, 'w') as f:
                 f.write(f"personal_ws-1.1 {lang} 0\n")
         
-        # Odczytaj istniejące słowa
-        with open(personal_path, 'r') as f:
-            lines = f.readlines()
-            
-        # Sprawdź, czy słowo już istnieje
-        words = [line.strip() for line in lines[1:] if line.strip()]
-        if word in words:
-            return True
-        
-        # Dodaj słowo do pliku
+        # Dodaj słowa do pliku
         with open(personal_path, 'a') as f:
-            f.write(word + "\n")
+            f.writelines(word + "\n" for word in to_add)
+        existing.update(to_add)
+        for word in to_add:
+            aspell_accept_word(lang, word)
         
         return True
     except Exception as e:
-        weechat.prnt("", weechat.color("red") + f"Error adding word with aspell: {e}" + weechat.color("reset"))
+        weechat.prnt("", _color_error + f"Error adding word with aspell: {e}" + _color_reset)
         return False
 
-def spellcheck_check_word(langs, word, add_rest=False):
-    """Sprawdzanie pisowni słowa w podanych językach."""
-    prefix = ""
-    suffix = ""
+def aspell_add_word(lang, word):
+    """Dodaje słowo do osobistego słownika aspell."""
+    return aspell_add_words(lang, [word])
+
+def spellcheck_split_word(word):
+    """Oddziela interpunkcję od słowa; zwraca (prefiks, słowo, sufiks) lub None, gdy słowo należy pominąć."""
+    # Pomiń sprawdzanie dla zbyt krótkich słów
+    if not word or len(word) < 2:
+        return None
+    
+    # Szybka ścieżka: zwykłe słowo z liter ASCII nie wymaga dalszych testów
+    if word.isascii() and word.isalpha():
+        return "", word, ""
     
     # Pomiń sprawdzanie dla ścieżek, URL-i, emaili, liczb
-    if not word or len(word) < 2:
-        return None  # Zbyt krótkie słowo
     if word.startswith("/"):
         return None  # wygląda jak ścieżka
-    if re.match(r"^\w+://", word):
+    if "://" in word:
         return None  # wygląda jak URL
-    if re.match(r"^[^@]+@[^@]+$", word):
+    at = word.find("@")
+    if 0 < at < len(word) - 1 and word.find("@", at + 1) == -1:
         return None  # wygląda jak email
     
-    # Usuń znaki interpunkcyjne na początku
-    match = re.match(r"^([^\w]*)(.*)", word)
-    if match:
-        if add_rest:
-            prefix = match.group(1)
-        word = match.group(2)
-    
-    # Usuń znaki interpunkcyjne na końcu
-    match = re.match(r"(.*)([^\w]*)$", word)
-    if match:
-        word = match.group(1)
-        if add_rest:
-            suffix = match.group(2)
+    prefix = ""
+    suffix = ""
+    if word.isascii():
+        # Usuń znaki interpunkcyjne na początku i na końcu
+        stripped_left = word.lstrip(_PUNCT)
+        stripped = stripped_left.rstrip(_PUNCT)
+        prefix = word[:len(word) - len(stripped_left)]
+        suffix = stripped_left[len(stripped):]
+        word = stripped
+    else:
+        # Dla znaków spoza ASCII sprawdzaj jak \w: litery i cyfry Unicode oraz "_"
+        start = 0
+        end = len(word)
+        while start < end and not (word[start].isalnum() or word[start] == "_"):
+            start += 1
+        while end > start and not (word[end - 1].isalnum() or word[end - 1] == "_"):
+            end -= 1
+        prefix = word[:start]
+        suffix = word[end:]
+        word = word[start:end]
     
     # Jeśli po usunięciu znaków interpunkcyjnych nic nie zostało
     if not word or len(word) < 2:
         return None
     
-    if re.match(r"^[\d\W]+$", word):
+    if not any(c.isalpha() for c in word):
         return None  # wygląda jak liczba
     
-    # Podziel na listę języków
+    return prefix, word, suffix
+
+def spellcheck_check_word(langs, word, add_rest=False):
+    """Sprawdzanie pisowni słowa w podanych językach."""
+    parts = spellcheck_split_word(word)
+    if parts is None:
+        return None
+    prefix, word, suffix = parts
+    
     try:
-        langs_list = langs.split("+")
-    except Exception as e:
-        debug_print(f"Error splitting languages: {e}")
-        langs_list = [langs]
+        suggestions = _check_impl(langs, word)
+    except AspellError as e:
+        if _debug:
+            debug_print(f"Cannot check '{word}': {e}")
+        return None  # W razie błędu zakładamy, że słowo jest poprawne
+    if suggestions is None:
+        return None  # Słowo jest poprawne
     
-    # Upewnij się, że mamy poprawne słowniki dla wszystkich języków
+    if add_rest:
+        return [f"{prefix}{sugg}{suffix}" for sugg in suggestions]
+    return list(suggestions)  # Zwróć listę sugestii lub pustą listę
+
+def get_spellers(langs):
+    """Zwraca listę przygotowanych języków dla ciągu "lang1+lang2" (wynik zapamiętywany)."""
+    langs_list = _langs_cache.get(langs)
+    if langs_list is None:
+        langs_list = []
+        # Podziel na listę języków (zwykle jest tylko jeden)
+        for lang in (langs.split("+") if "+" in langs else (langs,)):
+            # Pomiń języki, dla których nie udało się przygotować słownika (błąd zgłasza aspell_setup)
+            if not aspell_setup(lang):
+                continue
+            langs_list.append(lang)
+        _langs_cache[langs] = langs_list
+    return langs_list
+
+def spellcheck_is_misspelled(langs, word):
+    """Sprawdza tylko, czy słowo jest błędne (bez pobierania sugestii)."""
+    parts = spellcheck_split_word(word)
+    if parts is None:
+        return False
+    try:
+        return _misspelled_impl(langs, parts[1])
+    except AspellError as e:
+        if _debug:
+            debug_print(f"Cannot check '{parts[1]}': {e}")
+        return False  # W razie błędu zakładamy, że słowo jest poprawne
+
+def _is_correct(langs_list, word):
+    """Sprawdza, czy oczyszczone słowo jest poprawne w którymś z języków."""
+    # Słowo już wcześniej uznane za poprawne lub dodane do osobistego słownika
+    lower = word.lower()
     for lang in langs_list:
-        speller = aspell_setup(lang)
-        if not speller:
-            weechat.prnt("", weechat.color("red") + f"Error while setting up aspell for {lang}" + weechat.color("reset"))
-            return None
+        if word in _known_good.get(lang, _EMPTY_SET):
+            return True
+        personal = _load_personal(lang)
+        if word in personal or lower in personal:
+            return True
     
-    # Sprawdź pisownię w każdym języku
-    results = []
+    # Jeśli słowo jest poprawne w dowolnym języku, uznaj je za poprawne
+    failed = None
     for lang in langs_list:
         try:
-            # Jeśli słowo jest poprawne w dowolnym języku, uznaj je za poprawne
-            if aspell_check_word(lang, word):
-                return None  # Słowo jest poprawne
-            
-            # Jeśli słowo jest niepoprawne, pobierz sugestie
-            suggestions = aspell_get_suggestions(lang, word)
-            if add_rest:
-                results.extend([f"{prefix}{sugg}{suffix}" for sugg in suggestions])
-            else:
-                results.extend(suggestions)
-        except Exception as e:
-            debug_print(f"Error checking word '{word}' for {lang}: {e}")
+            if _check_cached(lang, word):
+                known_good = _known_good.setdefault(lang, set())
+                if len(known_good) >= KNOWN_GOOD_MAX:
+                    known_good.clear()
+                known_good.add(word)
+                return True
+        except AspellError as e:
+            if _debug:
+                debug_print(f"Error checking word '{word}' for {lang}: {e}")
+            failed = e
+    
+    # Nieznany wynik nie może trafić do zapamiętywanych wyników wyżej
+    if failed is not None:
+        raise failed
+    return False
+
+@functools.lru_cache(maxsize=4096)
+def _misspelled_impl(langs, word):
+    """Sprawdzanie oczyszczonego słowa bez sugestii (wynik zapamiętywany)."""
+    langs_list = get_spellers(langs)
+    if not langs_list:
+        return False  # Brak słownika - nie oznaczaj słowa jako błędnego
+    return not _is_correct(langs_list, word)
+
+@functools.lru_cache(maxsize=4096)
+def _check_impl(langs, word):
+    """Sprawdzanie oczyszczonego słowa w podanych językach (wynik zapamiętywany).
+    
+    Zwraca None dla poprawnego słowa lub krotkę sugestii.
+    """
+    # Wynik samego sprawdzenia jest współdzielony z modyfikatorem wejścia
+    if not _misspelled_impl(langs, word):
+        return None  # Słowo jest poprawne lub brak słownika
+    
+    # Słowo jest niepoprawne we wszystkich językach - pobierz sugestie
+    # z pierwszego (głównego) języka, a z pozostałych tylko na życzenie
+    langs_list = get_spellers(langs)
+    if _cfg["suggest_all_languages"] != "1":
+        langs_list = langs_list[:1]
+    
+    # AspellError przechodzi dalej, aby niepełny wynik nie został zapamiętany
+    results = []
+    for lang in langs_list:
+        results.extend(_suggestions_cached(lang, word))
     
-    return results if results else []  # Zwróć listę sugestii lub pustą listę
+    return tuple(results)
+
+def clear_check_caches():
+    """Czyści zapamiętane wyniki sprawdzania (np. po zmianie słownika)."""
+    _check_impl.cache_clear()
+    _misspelled_impl.cache_clear()
+    _check_cached.cache_clear()
+    _suggestions_cached.cache_clear()
+    _langs_cache.clear()
+
+def refresh_cmd_chars():
+    """Odczytuje weechat.look.command_chars i przygotowuje krotkę dla str.startswith."""
+    global _cmd_prefix_tuple
+    
+    cmd_chars = weechat.config_string(weechat.config_get("weechat.look.command_chars"))
+    # "/" jest zawsze znakiem komendy, command_chars zawiera tylko dodatkowe znaki
+    _cmd_prefix_tuple = tuple(set("/" + cmd_chars))
+
+def spellcheck_cmd_chars_cb(data, option, value):
+    """Obsługa zmiany weechat.look.command_chars."""
+    refresh_cmd_chars()
+    return weechat.WEECHAT_RC_OK
+
+def _parse_language_settings(raw):
+    """Parsuje ustawienie languages do słowników {(sieć, kanał): język} i {kanał: język}."""
+    per_chan = {}
+    per_chan_only = {}
+    for lang_str in raw.split(","):
+        parts = lang_str.strip().split("/")
+        if len(parts) == 3:  # network/channel/lang
+            net, chan, lang = parts
+            per_chan.setdefault((net.lower(), chan.lower()), lang)
+        elif len(parts) == 2:  # channel/lang
+            chan, lang = parts
+            per_chan_only.setdefault(chan.lower(), lang)
+    return per_chan, per_chan_only
+
+def get_language_maps():
+    """Zwraca sparsowane ustawienie languages (parsowane ponownie tylko po zmianie)."""
+    lang_settings = _cfg["languages"]
+    if lang_settings != _lang_rules_cache["raw"]:
+        _lang_rules_cache["maps"] = _parse_language_settings(lang_settings)
+        _lang_rules_cache["raw"] = lang_settings
+    return _lang_rules_cache["maps"]
 
 def find_language(buffer):
-    """Znalezienie odpowiedniego języka dla bufora."""
+    """Znalezienie odpowiedniego języka dla bufora (wynik zapamiętywany per bufor)."""
+    lang = _lang_cache.get(buffer)
+    if lang is None:
+        lang = _lookup_language(buffer)
+        _lang_cache[buffer] = lang
+    return lang
+
+def _lookup_language(buffer):
+    """Wyszukanie języka dla bufora w ustawieniach."""
     server = weechat.buffer_get_string(buffer, "localvar_server")
     channel = weechat.buffer_get_string(buffer, "localvar_channel")
     
     # Domyślny język, jeśli nie znaleziono specyficznego
-    default_lang = weechat.config_get_plugin("default_language")
+    default_lang = _cfg["default_language"]
     
     if not server or not channel:
         return default_lang
@@ -267,28 +649,23 @@ def find_language(buffer):
     server = server.lower()
     channel = channel.lower()
     
-    # Sprawdź ustawienia języków
-    lang_settings = weechat.config_get_plugin("languages")
-    languages = [lang.strip() for lang in lang_settings.split(",") if lang.strip()]
-    
-    for lang_str in languages:
-        parts = lang_str.split("/")
-        if len(parts) == 3:  # network/channel/lang
-            net, chan, lang = parts
-            if chan.lower() == channel and net.lower() == server:
-                return lang
-        elif len(parts) == 2:  # channel/lang
-            chan, lang = parts
-            if chan.lower() == channel:
-                return lang
-    
-    return default_lang
+    # Sprawdź ustawienia języków (najpierw sieć/kanał, potem sam kanał)
+    per_chan, per_chan_only = get_language_maps()
+    lang = per_chan.get((server, channel))
+    if lang is None:
+        lang = per_chan_only.get(channel, default_lang)
+    return lang
+
+def spellcheck_buffer_signal_cb(data, signal, signal_data):
+    """Usuwa zapamiętany język bufora, gdy bufor jest zamykany lub zmienia zmienne lokalne."""
+    _lang_cache.pop(signal_data, None)
+    return weechat.WEECHAT_RC_OK
 
 def create_suggestion_buffer():
     """Utworzenie bufora dla sugestii pisowni."""
     global suggestion_buffer
     
-    buffer_name = weechat.config_get_plugin("window_name")
+    buffer_name = _cfg["window_name"]
     if not buffer_name:
         return None
     
@@ -301,101 +678,75 @@ def create_suggestion_buffer():
             weechat.buffer_set(suggestion_buffer, "display", "1")
             
             # Ustaw wysokość okna
-            height = weechat.config_get_plugin("window_height")
+            height = _cfg["window_height"]
             weechat.command("", f"/window splith {height}")
     
     return suggestion_buffer
 
 def spellcheck_input_cb(data, modifier, buffer, string):
     """Obsługa wprowadzanego tekstu."""
-    if weechat.config_get_plugin("enabled") != "1":
-        return string
-    
-    # Sprawdź tylko gdy ostatni znak to spacja lub znak interpunkcyjny
-    if not string or string[-1] not in " .?!":
+    # Sprawdź tylko gdy ostatni znak to spacja lub znak interpunkcyjny;
+    # bez koloru błędnych słów modyfikator i tak niczego nie zmieni
+    if not string or string[-1] not in _TRIGGER_CHARS or not _enabled_bool or not _cfg["word_color"]:
         return string
     
     # Pomiń komendy (oprócz /say i /me)
-    cmd_chars = weechat.config_string(weechat.config_get("weechat.look.command_chars"))
-    if string.startswith(tuple(cmd_chars)) and not re.match(f"^[{re.escape(cmd_chars)}](say|me)\\s", string, re.I):
+    if string.startswith(_cmd_prefix_tuple):
+        head = string[1:].split(None, 1)
+        if not head or head[0].lower() not in ("say", "me"):
+            return string
+    
+    # Znajdź ostatnie słowo jednym przejściem od końca tekstu,
+    # pomijając końcowe spacje i znaki interpunkcyjne
+    end = len(string) - 1
+    while end >= 0 and string[end] in _TRIGGER_CHARS:
+        end -= 1
+    if end < 0:
         return string
     
-    # Rozdziel tekst na słowa i znajdź ostatnie
-    words = re.findall(r'\S+', string)
-    if not words:
-        return string
+    start = end
+    while start >= 0 and not string[start].isspace():
+        start -= 1
+    start += 1
     
-    # Pobierz ostatnie słowo i jego pozycję
-    last_word = words[-1]
-    original_last_word = last_word  # Zachowaj oryginalne słowo do określenia pozycji
-    
-    # Usuń znak interpunkcyjny z końca słowa do sprawdzenia
-    if last_word[-1] in ".?!":
-        last_word = last_word[:-1]
-    
-    if not last_word:
-        return string
-    
-    # Znajdź pozycję ostatniego słowa w tekście
-    last_word_pos = string.rfind(original_last_word)
-    if last_word_pos == -1:
-        debug_print(f"Cannot find position of word: '{original_last_word}' in '{string}'")
-        return string
+    last_word = string[start:end + 1]
+    last_word_pos = start
+    last_word_end = end + 1
     
     # Pobierz język dla bieżącego bufora
     lang = find_language(buffer)
-    debug_print(f"Language for current buffer: {lang}")
+    if _debug:
+        debug_print(f"Language for current buffer: {lang}")
     
     if lang == "und":  # Nieokreślony język
         return string
     
-    # Sprawdź czy słowo jest niepoprawne i pobierz sugestie
-    suggestions = spellcheck_check_word(lang, last_word)
-    
-    # Jeśli nie ma sugestii lub słowo jest poprawne, zwróć oryginalny string
-    if suggestions is None:
-        debug_print(f"Word '{last_word}' is correct or ignored")
+    # Sprawdź czy słowo jest niepoprawne (sugestie są potrzebne tylko przy uzupełnianiu)
+    if not spellcheck_is_misspelled(lang, last_word):
+        if _debug:
+            debug_print(f"Word '{last_word}' is correct or ignored")
         return string
     
     # Słowo jest niepoprawne - podkreśl je kolorem
-    debug_print(f"Word '{last_word}' is incorrect. Suggestions: {suggestions}")
+    if _debug:
+        debug_print(f"Word '{last_word}' is incorrect")
     
-    word_color = weechat.config_get_plugin("word_color")
-    if word_color:
-        # Zastosuj kolorowanie bezpośrednio w tekście wejściowym
-        color_code = weechat.color(word_color)
-        reset_code = weechat.color("reset")
-        
-        # Zbuduj nowy string z podkreślonym słowem
-        # Uwaga: zachowujemy znaki interpunkcyjne
-        if original_last_word[-1] in ".?!" and len(original_last_word) > 1:
-            # Podkreśl tylko część słowa bez znaku interpunkcyjnego
-            punctuation = original_last_word[-1]
-            colored_word = color_code + original_last_word[:-1] + reset_code + punctuation
-        else:
-            colored_word = color_code + original_last_word + reset_code
-        
-        # Zastąp oryginalne słowo kolorowanym
-        result = string[:last_word_pos] + colored_word
-        
-        # Dodaj resztę tekstu jeśli istnieje
-        if last_word_pos + len(original_last_word) < len(string):
-            result += string[last_word_pos + len(original_last_word):]
-        
+    # Zastąp ostatnie słowo kolorowanym, zachowując znaki interpunkcyjne po nim
+    result = "".join((string[:last_word_pos], _color_word, last_word, _color_reset, string[last_word_end:]))
+    
+    if _debug:
         debug_print(f"Original string: '{string}'")
         debug_print(f"Colored string: '{result}'")
-        
-        # Zamień string wejściowy na wersję z kolorami
-        return result
     
-    return string
+    # Zamień string wejściowy na wersję z kolorami
+    return result
 
 def spellcheck_input_return_cb(data, modifier, buffer, string):
     """Obsługa Enter - ukryj bufor sugestii."""
     global suggestion_buffer
     
     if suggestion_buffer:
-        window_name = weechat.config_get_plugin("window_name")
+        window_name = _cfg["window_name"]
         if window_name:
             weechat.command("", f"/window hide {window_name}")
     
@@ -403,7 +754,7 @@ def spellcheck_input_return_cb(data, modifier, buffer, string):
 
 def spellcheck_complete_cb(data, completion_item, buffer, completion):
     """Dodawanie sugestii pisowni do listy uzupełnień."""
-    if weechat.config_get_plugin("enabled") != "1":
+    if not _enabled_bool:
         return weechat.WEECHAT_RC_OK
     
     input_line = weechat.buffer_get_string(buffer, "input")
@@ -413,8 +764,15 @@ def spellcheck_complete_cb(data, completion_item, buffer, completion):
     if input_pos <= 0 or not input_line:
         return weechat.WEECHAT_RC_OK
     
-    word_start = input_line[:input_pos].rstrip().rfind(" ") + 1
-    word = input_line[word_start:input_pos]
+    # Jedno przejście wstecz od kursora: pomiń spacje, potem cofnij się do początku słowa
+    i = min(input_pos, len(input_line)) - 1
+    while i >= 0 and input_line[i].isspace():
+        i -= 1
+    end = i + 1
+    while i >= 0 and not input_line[i].isspace():
+        i -= 1
+    word_start = i + 1
+    word = input_line[word_start:end]
     
     if not word:
         return weechat.WEECHAT_RC_OK
@@ -444,52 +802,149 @@ def spellcheck_add_cb(data, buffer, args):
         return weechat.WEECHAT_RC_ERROR
     
     weechat.prnt(buffer, f"Adding to {lang} dictionary: {' '.join(words)}")
-    for word in words:
-        success = aspell_add_word(lang, word)
-        if not success:
-            weechat.prnt(buffer, weechat.color("red") + f"Error adding word '{word}' to dictionary" + weechat.color("reset"))
+    if not aspell_add_words(lang, words):
+        weechat.prnt(buffer, _color_error + f"Error adding words to dictionary: {' '.join(words)}" + _color_reset)
+    
+    # Słownik osobisty się zmienił - wyniki w pamięci podręcznej są nieaktualne
+    clear_check_caches()
     
     return weechat.WEECHAT_RC_OK
 
 def spellcheck_show_suggestions_cb(data, buffer, args):
-    """Wyświetla sugestie dla słowa podanego jako argument."""
+    """Wyświetla sugestie dla słów podanych jako argumenty."""
+    global _suggest_request_id
+    
     if not args:
-        weechat.prnt(buffer, "Usage: /spellcheck_suggest <word>")
+        weechat.prnt(buffer, "Usage: /spellcheck_suggest <word>...")
         return weechat.WEECHAT_RC_OK
     
-    word = args.strip()
+    words = args.split()
     lang = find_language(buffer)
     
     if lang == "und":
         weechat.prnt(buffer, "No language set for this buffer.")
         return weechat.WEECHAT_RC_OK
     
-    is_correct = aspell_check_word(lang, word)
+    # Sprawdzenie w osobnym procesie obsługiwanym przez pętlę WeeChat, aby nie blokować interfejsu
+    _suggest_request_id += 1
+    request_id = str(_suggest_request_id)
+    
+    hook = weechat.hook_process_hashtable(
+        "aspell",
+        {"arg1": "-a", "arg2": "--lang=" + lang.split("+", 1)[0], "arg3": "--encoding=utf-8", "stdin": "1"},
+        ASPELL_PROCESS_TIMEOUT,
+        "spellcheck_suggest_process_cb",
+        request_id
+    )
+    if not hook:
+        weechat.prnt(buffer, _color_error + "Error running aspell" + _color_reset)
+        return weechat.WEECHAT_RC_ERROR
+    
+    _pending_suggest[request_id] = {"buffer": buffer, "words": words, "out": []}
+    weechat.hook_set(hook, "stdin", "!\n" + "".join("^" + word + "\n" for word in words))
+    weechat.hook_set(hook, "stdin_close", "")
     
-    if is_correct:
-        weechat.prnt(buffer, f"Word '{word}' is spelled correctly.")
+    return weechat.WEECHAT_RC_OK
+
+def spellcheck_suggest_process_cb(data, command, return_code, out, err):
+    """Odbiera wynik asynchronicznego "aspell -a" i wyświetla sugestie."""
+    request = _pending_suggest.get(data)
+    if request is None:
         return weechat.WEECHAT_RC_OK
     
-    word_color = weechat.config_get_plugin("word_color")
-    colored_word = f"{weechat.color(word_color)}{word}{weechat.color('reset')}"
+    request["out"].append(out)
+    if return_code == weechat.WEECHAT_HOOK_PROCESS_RUNNING:
+        return weechat.WEECHAT_RC_OK  # Czekaj na resztę wyjścia
+    del _pending_suggest[data]
     
-    suggestions = aspell_get_suggestions(lang, word)
+    buffer = request["buffer"]
+    if return_code != 0:
+        if _debug:
+            debug_print(f"Aspell error ({return_code}): {err}")
+        weechat.prnt(buffer, _color_error + "Error getting suggestions with aspell" + _color_reset)
+        return weechat.WEECHAT_RC_OK
     
-    if suggestions and len(suggestions) > 0:
-        sugg_text = ", ".join(suggestions[:15])  # Ogranicz do 15 sugestii
-        weechat.prnt(buffer, f"Suggestions for {colored_word} - {sugg_text}")
-    else:
-        weechat.prnt(buffer, f"No suggestions for {colored_word}")
+    # Pierwsza linia to nagłówek z wersją, potem odpowiedzi zakończone pustą linią
+    replies = []
+    lines = []
+    for line in "".join(request["out"]).split("\n")[1:]:
+        if line:
+            lines.append(line)
+        else:
+            replies.append(lines)
+            lines = []
+    
+    for word, reply in zip(request["words"], replies):
+        suggestions = aspell_parse_reply(reply)
+        if suggestions is None:
+            weechat.prnt(buffer, f"Word '{word}' is spelled correctly.")
+            continue
+        
+        colored_word = f"{_color_word}{word}{_color_reset}"
+        if suggestions:
+            sugg_text = ", ".join(suggestions[:15])  # Ogranicz do 15 sugestii
+            weechat.prnt(buffer, f"Suggestions for {colored_word} - {sugg_text}")
+        else:
+            weechat.prnt(buffer, f"No suggestions for {colored_word}")
+    
+    return weechat.WEECHAT_RC_OK
+
+def set_input_hook(enabled):
+    """Podpina lub odpina modyfikator input_text_display zależnie od opcji enabled."""
+    global _input_hook, _enabled_bool
+    
+    _enabled_bool = enabled
+    if enabled and not _input_hook:
+        # Używamy "input_text_display" zamiast "input_text_display_with_cursor" dla lepszego kolorowania
+        _input_hook = weechat.hook_modifier("input_text_display", "spellcheck_input_cb", "")
+    elif not enabled and _input_hook:
+        weechat.unhook(_input_hook)
+        _input_hook = None
+
+def refresh_colors():
+    """Odświeża zapamiętane kody kolorów."""
+    global _color_word, _color_reset, _color_error
     
+    _color_word = weechat.color(_cfg["word_color"])
+    _color_reset = weechat.color("reset")
+    _color_error = weechat.color("red")
+
+def spellcheck_clear_cache_cb(data, buffer, args):
+    """Czyści wszystkie zapamiętane wyniki sprawdzania pisowni."""
+    forget_failed_setups()
+    clear_check_caches()
+    _known_good.clear()
+    weechat.prnt(buffer, "Spellcheck cache cleared")
     return weechat.WEECHAT_RC_OK
 
 def config_cb(data, option, value):
     """Obsługa zmian konfiguracji."""
+    global _debug
+    
+    name = option.rsplit(".", 1)[-1]
+    _cfg[name] = value
+    if name == "debug":
+        _debug = value == "1"
+    if name == "word_color":
+        refresh_colors()
+    if name == "enabled":
+        set_input_hook(value == "1")
+    if name == "suggest_all_languages":
+        _check_impl.cache_clear()
+    if name in ("languages", "default_language"):
+        forget_failed_setups()
+        clear_check_caches()
+        _lang_cache.clear()
+        if name == "languages":
+            get_language_maps()
+        start_preload()
     return weechat.WEECHAT_RC_OK
 
 # Główna funkcja inicjalizująca skrypt
 def init_script():
-    if not weechat.register(SCRIPT_NAME, SCRIPT_AUTHOR, SCRIPT_VERSION, SCRIPT_LICENSE, SCRIPT_DESC, "", ""):
+    global _debug
+    
+    if not weechat.register(SCRIPT_NAME, SCRIPT_AUTHOR, SCRIPT_VERSION, SCRIPT_LICENSE, SCRIPT_DESC, "aspell_shutdown_cb", ""):
         return
     
     # Sprawdź czy aspell jest zainstalowany
@@ -509,6 +964,7 @@ def init_script():
         "word_input_color": "underline",
         "window_name": "",
         "window_height": "10",
+        "suggest_all_languages": "0",  # Domyślnie sugestie tylko z pierwszego języka
         "debug": "0"  # Dodatkowa opcja do debugowania
     }
     
@@ -516,6 +972,7 @@ def init_script():
         if not weechat.config_is_set_plugin(option):
             weechat.config_set_plugin(option, value)
             weechat.config_set_desc_plugin(option, f"Spellcheck: {option}")
+        _cfg[option] = weechat.config_get_plugin(option)
     
     # Zarejestruj komendy
     weechat.hook_command(
@@ -531,20 +988,40 @@ def init_script():
     # Dodaj komendę do wyświetlania sugestii
     weechat.hook_command(
         "spellcheck_suggest",
-        "Show spelling suggestions for a word",
-        "<word>",
+        "Show spelling suggestions for words",
+        "<word>...",
         "word: word to check for spelling suggestions",
         "",
         "spellcheck_show_suggestions_cb",
         ""
     )
     
-    # Zarejestruj hooki
-    # Używamy "input_text_display" zamiast "input_text_display_with_cursor" dla lepszego kolorowania
-    weechat.hook_modifier("input_text_display", "spellcheck_input_cb", "")
+    # Dodaj komendę do czyszczenia zapamiętanych wyników
+    weechat.hook_command(
+        "spellcheck_clear_cache",
+        "Clear cached spellcheck results",
+        "",
+        "",
+        "",
+        "spellcheck_clear_cache_cb",
+        ""
+    )
+    
+    refresh_colors()
+    refresh_cmd_chars()
+    _debug = _cfg["debug"] == "1"
+    
+    # Przygotuj w tle słowniki dla języka domyślnego i języków z ustawienia languages
+    start_preload()
+    
+    # Zarejestruj hooki (modyfikator wejścia tylko gdy sprawdzanie jest włączone)
+    set_input_hook(_cfg["enabled"] == "1")
     weechat.hook_modifier("input_return", "spellcheck_input_return_cb", "")
     weechat.hook_completion("spellcheck_suggestions", "Spelling suggestions", "spellcheck_complete_cb", "")
     weechat.hook_config("plugins.var.python." + SCRIPT_NAME + ".*", "config_cb", "")
+    weechat.hook_config("weechat.look.command_chars", "spellcheck_cmd_chars_cb", "")
+    weechat.hook_signal("buffer_closing", "spellcheck_buffer_signal_cb", "")
+    weechat.hook_signal("buffer_localvar_*", "spellcheck_buffer_signal_cb", "")
     
     # Wyświetl komunikat o pomyślnym załadowaniu
     weechat.prnt("", f"{SCRIPT_NAME} {SCRIPT_VERSION} loaded successfully. Use /set plugins.var.python.spellcheck.* to configure.")
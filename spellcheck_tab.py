@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import weechat
-import re
+import functools
+import bisect
+import threading
 import enchant
 
 ###############################################################
@@ -21,88 +23,185 @@ SCRIPT_DESC = (
 
 # Globalne słowniki stanu
 spellers = {}
-last_suggestions = {}         # Sugestie ograniczone do maks. 5
-current_suggestion_index = {}
-last_word_position = {}        # Zapisuje (start_index, długość) błędnego słowa
-suggestion_active = {}
+_spellers_lock = threading.Lock()  # spellers wypełniany także przez wątek _prewarm
+_BROKER = None                # wspólny enchant.Broker dla wszystkich języków
+states = {}                   # buffer_ptr -> BufferState
+_nick_cache = {}              # buffer_ptr -> (posortowana lista (nick.lower(), nick), zbiór nick.lower())
+_pending_timer = {}           # buffer_ptr -> hook timera odłożonego sprawdzania
+_last_render = {}             # buffer_ptr -> (input, pozycja kursora, wyświetlony input)
+_COLOR = {"word": "", "reset": "", "magenta": ""}  # kody kolorów (odświeżane przez config_cb)
+_DEBUG = False                # kopia opcji debug_mode (odświeżana przez config_cb)
+CHECK_DELAY_MS = 120          # Opóźnienie sprawdzania słowa podczas szybkiego pisania
 languages = ["pl_PL", "en_US", "de_DE"]
-original_word = {}            # Zapamiętuje oryginalne (błędne) słowo
+
+# Stałe do rozpoznawania słów
+_URL_PREFIXES = ("http://", "https://")
+_TRAIL_PUNCT = ".,!?"
+
+# Komendy /input, które resetują stan sugestii
+_RESET_ACTIONS = frozenset(("return", "transpose_chars", "undo", "redo"))
+_RESET_PREFIXES = ("delete_", "move_", "history_", "search_")
+
+class BufferState:
+    """Stan sugestii dla jednego bufora."""
+    __slots__ = ("suggestions", "idx", "word_start", "word_length", "orig_word", "active",
+                 "bracket_cache")
+
+    def __init__(self, suggestions, word_start, word_length, orig_word):
+        self.suggestions = suggestions  # Sugestie ograniczone do maks. 5
+        self.idx = -1                   # Indeks wybranej sugestii (-1 = brak)
+        self.word_start = word_start    # Początek błędnego słowa w inpucie
+        self.word_length = word_length  # Długość słowa (po TAB - wstawionej sugestii)
+        self.orig_word = orig_word      # Oryginalne (błędne) słowo
+        self.active = False             # Czy TAB podmienił już słowo
+        self.bracket_cache = None       # (idx, tekst " [sugestie]") z ostatniego renderowania
 
 def debug_log(message):
-    if weechat.config_get_plugin("debug_mode") == "1":
+    if _DEBUG:
         weechat.prnt("", f"DEBUG: {message}")
 
-def get_speller(lang):
-    """Zwraca obiekt speller dla danego języka (preferowany Hunspell, fallback Aspell)."""
-    if lang not in spellers:
-        try:
-            broker = enchant.Broker()
+def _get_broker():
+    """Zwraca wspólny obiekt enchant.Broker (tworzony przy pierwszym użyciu, pod _spellers_lock)."""
+    global _BROKER
+    if _BROKER is None:
+        _BROKER = enchant.Broker()
+    return _BROKER
+
+def _load_speller(lang):
+    """
+    Wczytuje słownik dla danego języka (preferowany Hunspell, fallback Aspell).
+    Wywoływane także z wątku w tle, więc nie może korzystać z API WeeChat.
+    """
+    with _spellers_lock:
+        speller = spellers.get(lang)
+        if speller is None:
+            broker = _get_broker()
             broker.set_ordering(lang, "hunspell,aspell")
-            spellers[lang] = broker.request_dict(lang)
+            speller = spellers[lang] = broker.request_dict(lang)
+    return speller
+
+def _prewarm():
+    """Wczytuje w tle słowniki wszystkich języków przed pierwszym sprawdzeniem."""
+    for lang in languages:
+        try:
+            _load_speller(lang)
         except enchant.DictNotFoundError:
-            weechat.prnt("", f"⚠️ Słownik nie znaleziony: {lang}")
-            return None
-    return spellers[lang]
+            pass  # Ostrzeżenie wyświetli get_speller w głównym wątku
+
+def get_speller(lang):
+    """Zwraca obiekt speller dla danego języka (preferowany Hunspell, fallback Aspell)."""
+    speller = spellers.get(lang)
+    if speller is not None:
+        return speller
+    try:
+        return _load_speller(lang)
+    except enchant.DictNotFoundError:
+        weechat.prnt("", f"⚠️ Słownik nie znaleziony: {lang}")
+        return None
+
+def _get_nicks(buffer):
+    """
+    Zwraca zapamiętane nicki bufora jako krotkę
+    (posortowana lista (nick.lower(), nick), zbiór nick.lower()).
+    """
+    buffer_ptr = str(buffer)
+    cached = _nick_cache.get(buffer_ptr)
+    if cached is None:
+        nicks = []
+        # Pobierz nicklist dla danego buffera
+        infolist = weechat.infolist_get("nicklist", buffer, "")
+        if infolist:
+            while weechat.infolist_next(infolist):
+                # Sprawdź czy to nick (a nie grupa)
+                if weechat.infolist_string(infolist, "type") == "nick":
+                    nick = weechat.infolist_string(infolist, "name")
+                    nicks.append((nick.lower(), nick))
+            weechat.infolist_free(infolist)
+        nicks.sort()
+        cached = _nick_cache[buffer_ptr] = (nicks, {nick_lower for nick_lower, _ in nicks})
+    return cached
 
 def get_matching_nicks(buffer, word_prefix):
     """Zwraca listę nicków z kanału zaczynających się od podanego prefiksu."""
-    matching_nicks = []
+    nicks = _get_nicks(buffer)[0]
     
-    # Pobierz nicklist dla danego buffera
-    infolist = weechat.infolist_get("nicklist", buffer, "")
-    if infolist:
-        while weechat.infolist_next(infolist):
-            # Sprawdź czy to nick (a nie grupa)
-            if weechat.infolist_string(infolist, "type") == "nick":
-                nick = weechat.infolist_string(infolist, "name")
-                # Sprawdź czy nick zaczyna się od podanego prefiksu (case-insensitive)
-                if nick.lower().startswith(word_prefix.lower()):
-                    matching_nicks.append(nick)
-        weechat.infolist_free(infolist)
+    # Nicki z danym prefiksem (case-insensitive) leżą obok siebie na posortowanej liście
+    prefix = word_prefix.lower()
+    matching_nicks = []
+    for i in range(bisect.bisect_left(nicks, (prefix,)), len(nicks)):
+        nick_lower, nick = nicks[i]
+        if not nick_lower.startswith(prefix):
+            break
+        matching_nicks.append(nick)
     
     return matching_nicks
 
-def check_word(word, buffer=None):
+def nicklist_signal_cb(data, signal, signal_data):
+    """Zmiana listy nicków - zapomnij zapamiętaną listę dla bufora."""
+    _nick_cache.pop(signal_data.split(",", 1)[0], None)
+    return weechat.WEECHAT_RC_OK
+
+@functools.lru_cache(maxsize=4096)
+def _spell_lookup(word):
     """
-    Sprawdza słowo we wszystkich skonfigurowanych językach.
-    Zwraca listę maksymalnie 5 propozycji lub None, jeśli słowo jest poprawne/bez sugestii.
+    Sprawdza słowo w słownikach wszystkich języków (wynik zapamiętywany, słowniki są stałe).
+    Zwraca krotkę (czy_poprawne, krotka_sugestii).
     """
-    if len(word) < 2 or re.match(r"(^/|https?://|\S+@\S+|\d+)", word):
-        return None
-
-    # Najpierw sprawdzamy czy słowo jest poprawne w którymś z języków
-    word_is_correct = False
-    all_suggestions = []
-
+    # Najpierw tanie check() we wszystkich językach, dopiero potem kosztowne suggest()
+    active_spellers = []
     for lang in languages:
         speller = get_speller(lang)
         if not speller:
             continue
         if speller.check(word):
-            word_is_correct = True
-            break
+            return True, ()
+        active_spellers.append(speller)
+
+    all_suggestions = []
+    seen = set()
+
+    for speller in active_spellers:
         suggestions = speller.suggest(word)
         if suggestions:
             for s in suggestions:
-                if s not in all_suggestions:
-                    all_suggestions.append(s)
+                if s in seen:
+                    continue
+                seen.add(s)
+                all_suggestions.append(s)
                 if len(all_suggestions) >= 5:
                     break
         if len(all_suggestions) >= 5:
             break
 
-    # Jeśli słowo jest poprawne lub nie ma sugestii słownikowych, kończymy
+    return False, tuple(all_suggestions)
+
+def check_word(word, buffer=None):
+    """
+    Sprawdza słowo we wszystkich skonfigurowanych językach.
+    Zwraca listę maksymalnie 5 propozycji lub None, jeśli słowo jest poprawne/bez sugestii.
+    """
+    # Pomiń komendy, URL-e, adresy email i liczby (proste testy zamiast wyrażenia regularnego)
+    if (len(word) < 2 or word[0] == "/" or word[0].isdecimal()
+            or word.startswith(_URL_PREFIXES) or "@" in word[1:-1]):
+        return None
+
+    # Na kanale i w rozmowie prywatnej nick nie jest błędem - sprawdź go przed słownikami
+    is_chat = bool(buffer) and weechat.buffer_get_string(buffer, "localvar_type") in ("channel", "private")
+    if is_chat and word.lower() in _get_nicks(buffer)[1]:
+        return None
+
+    # Najpierw sprawdzamy czy słowo jest poprawne w którymś z języków
+    word_is_correct, suggestions = _spell_lookup(word)
     if word_is_correct:
         return None
+    all_suggestions = list(suggestions)
     
     # Jeśli słowo jest niepoprawne i jesteśmy na kanale, sprawdź pasujące nicki
-    if buffer and not word_is_correct:
-        buffer_type = weechat.buffer_get_string(buffer, "localvar_type")
-        if buffer_type in ["channel", "private"]:
-            matching_nicks = get_matching_nicks(buffer, word)
-            # Dodaj pasujące nicki na początek sugestii
-            if matching_nicks:
-                all_suggestions = matching_nicks + all_suggestions
+    if is_chat:
+        matching_nicks = get_matching_nicks(buffer, word)
+        # Dodaj pasujące nicki na początek sugestii
+        if matching_nicks:
+            all_suggestions = matching_nicks + all_suggestions
     
     return all_suggestions[:5] if all_suggestions else None
 
@@ -113,28 +212,112 @@ def find_word_at_cursor(text, cursor_pos):
     """
     if cursor_pos > len(text):
         cursor_pos = len(text)
-    left_text = text[:cursor_pos]
-    match = re.search(r'(\S+)$', left_text)
-    if not match:
+    # Cofaj się od kursora do najbliższego białego znaku
+    word_start = cursor_pos
+    while word_start > 0 and not text[word_start - 1].isspace():
+        word_start -= 1
+    # Pomiń interpunkcję na końcu słowa
+    word_end = cursor_pos
+    while word_end > word_start and text[word_end - 1] in _TRAIL_PUNCT:
+        word_end -= 1
+    if word_end == word_start:
         return None, -1, 0
-    word = match.group(1)
-    word = re.sub(r"[.,!?]+$", "", word)
-    word_start = match.start(1)
-    word_length = len(word)
-    return word, word_start, word_length
+    return text[word_start:word_end], word_start, word_end - word_start
 
-def input_modifier_cb(data, modifier, buffer, string):
+def _bracket_text(st):
     """
-    Modyfikacja wyświetlania inputu.
-      - Jeśli suggestion_active==True, wyświetlamy oryginalne błędne słowo
-        i [sugestie] z aktualnie wybraną (podświetloną na magenta).
-      - Jeśli suggestion_active==False, sprawdzamy bieżące słowo i generujemy sugestie.
+    Zwraca tekst " [sugestie]" dla stanu bufora; wybrana sugestia jest wyróżniona
+    kolorem magenta. Wynik jest zapamiętywany, dopóki nie zmieni się indeks.
     """
+    cache = st.bracket_cache
+    if cache and cache[0] == st.idx:
+        return cache[1]
+    formatted_suggs = []
+    for i, s in enumerate(st.suggestions[:5]):
+        if i == st.idx:
+            formatted_suggs.append(f"{_COLOR['magenta']}{s}{_COLOR['reset']}")
+        else:
+            formatted_suggs.append(s)
+    bracket_text = f" [{', '.join(formatted_suggs)}]"
+    st.bracket_cache = (st.idx, bracket_text)
+    return bracket_text
+
+def _render_with_suggestions(string, st):
+    """Zwraca input z podświetlonym błędnym słowem i [sugestiami] za nim."""
+    word_end = st.word_start + st.word_length
+    return (f"{string[:st.word_start]}{_COLOR['word']}{st.orig_word}{_COLOR['reset']}"
+            f"{_bracket_text(st)}{string[word_end:]}")
+
+def _schedule_check(buffer_ptr):
+    """Odkłada sprawdzenie słowa pod kursorem, aż użytkownik na chwilę przestanie pisać."""
+    hook = _pending_timer.pop(buffer_ptr, None)
+    if hook:
+        weechat.unhook(hook)
+    _pending_timer[buffer_ptr] = weechat.hook_timer(CHECK_DELAY_MS, 0, 1, "check_timer_cb", buffer_ptr)
+
+def _run_check(buffer_ptr):
+    """
+    Sprawdza słowo pod kursorem i zapisuje wynik w stanie bufora
+    (także pusty, aby nie sprawdzać tego samego słowa ponownie).
+    Zwraca True, jeśli są sugestie do wyświetlenia.
+    """
+    hook = _pending_timer.pop(buffer_ptr, None)
+    if hook:
+        weechat.unhook(hook)
+    _last_render.pop(buffer_ptr, None)  # Stan się zmieni - poprzedni wynik jest nieaktualny
+    text = weechat.buffer_get_string(buffer_ptr, "input")
+    cursor_pos = weechat.buffer_get_integer(buffer_ptr, "input_pos")
+    word, word_start, word_length = find_word_at_cursor(text, cursor_pos)
+    if not word:
+        states.pop(buffer_ptr, None)
+        return False
+    # Sprawdź słowo i uzyskaj sugestie (najpierw spellcheck, potem nicki)
+    suggestions = check_word(word, buffer_ptr)
+    states[buffer_ptr] = BufferState(suggestions or (), word_start, word_length, word)
+    return bool(suggestions)
+
+def check_timer_cb(data, remaining_calls):
+    """Przerwa w pisaniu - sprawdź słowo i odśwież wyświetlany input."""
+    _pending_timer.pop(data, None)  # Jednorazowy timer - WeeChat sam go usunie
+    if _run_check(data):
+        weechat.bar_item_update("input_text")
+    return weechat.WEECHAT_RC_OK
+
+def buffer_closing_cb(data, signal, signal_data):
+    """Zamknięcie bufora - usuń jego stan i anuluj odłożone sprawdzanie słowa."""
+    buffer_ptr = str(signal_data)
+    for dct in (states, _nick_cache, _last_render):
+        dct.pop(buffer_ptr, None)
+    hook = _pending_timer.pop(buffer_ptr, None)
+    if hook:
+        weechat.unhook(hook)
+    return weechat.WEECHAT_RC_OK
+
+def input_modifier_cb(data, modifier, buffer, string):
+    """Modyfikacja wyświetlania inputu (wynik zapamiętywany do zmiany inputu, kursora lub stanu)."""
     if not string.strip():
         return string
         
     buffer_ptr = str(buffer)
     cursor_pos = weechat.buffer_get_integer(buffer, "input_pos")
+    
+    # Odświeżenie bez zmiany inputu i kursora (np. zmiana okna) - zwróć poprzedni wynik
+    prev = _last_render.get(buffer_ptr)
+    if prev and prev[0] == string and prev[1] == cursor_pos:
+        return prev[2]
+    
+    rendered = _render_input(buffer_ptr, string, cursor_pos)
+    _last_render[buffer_ptr] = (string, cursor_pos, rendered)
+    return rendered
+
+def _render_input(buffer_ptr, string, cursor_pos):
+    """
+    Zwraca input do wyświetlenia.
+      - Jeśli stan bufora jest aktywny (po TAB), wyświetlamy oryginalne błędne słowo
+        i [sugestie] z aktualnie wybraną (podświetloną na magenta).
+      - W przeciwnym razie pokazujemy zapamiętane sugestie dla słowa pod kursorem
+        albo odkładamy jego sprawdzenie do chwili przerwy w pisaniu.
+    """
     current_word, cur_start, cur_length = find_word_at_cursor(string, cursor_pos)
     
     # Jeśli nie znaleziono słowa pod kursorem
@@ -142,142 +325,129 @@ def input_modifier_cb(data, modifier, buffer, string):
         return string
 
     # Jeśli mieliśmy stare dane słowa, ale user przeszedł do innego fragmentu → reset
-    old_info = last_word_position.get(buffer_ptr)
-    if old_info:
-        old_start, old_length, old_word = old_info
-        if (cur_start != old_start or cur_length != old_length):
-            # Użytkownik przesunął się do innego słowa
-            for dct in (
-                last_suggestions,
-                current_suggestion_index,
-                last_word_position,
-                original_word,
-                suggestion_active
-            ):
-                dct.pop(buffer_ptr, None)
-
-    if (suggestion_active.get(buffer_ptr, False)
-        and buffer_ptr in original_word
-        and buffer_ptr in last_suggestions
-        and buffer_ptr in last_word_position):
-        suggestions = last_suggestions[buffer_ptr]
-        idx = current_suggestion_index.get(buffer_ptr, -1)
-        orig_word = original_word[buffer_ptr]
-        wstart, wlength, _ = last_word_position[buffer_ptr]
-
-        color = weechat.color(weechat.config_get_plugin("word_color") or "red")
-        highlighted_word = f"{color}{orig_word}{weechat.color('reset')}"
-        visible_suggs = suggestions[:5]
-        formatted_suggs = []
-        for i, s in enumerate(visible_suggs):
-            if i == idx:
-                formatted_suggs.append(weechat.color("magenta") + s + weechat.color("reset"))
-            else:
-                formatted_suggs.append(s)
-        bracket_text = " [" + ", ".join(formatted_suggs) + "]"
-        new_string = (string[:wstart] +
-                      highlighted_word +
-                      bracket_text +
-                      string[wstart + wlength:])
-        return new_string
+    st = states.get(buffer_ptr)
+    if st and (cur_start != st.word_start or cur_length != st.word_length):
+        # Użytkownik przesunął się do innego słowa
+        del states[buffer_ptr]
+        st = None
+
+    if st and st.active:
+        return _render_with_suggestions(string, st)
     else:
-        # Sprawdź słowo i uzyskaj sugestie (najpierw spellcheck, potem nicki)
-        suggestions = check_word(current_word, buffer)
-        if not suggestions:
-            # Brak sugestii -> wyczyść stare dane
-            for dct in (last_suggestions, current_suggestion_index, last_word_position, original_word, suggestion_active):
-                dct.pop(buffer_ptr, None)
-            return string
-            
-        last_suggestions[buffer_ptr] = suggestions
-        last_word_position[buffer_ptr] = (cur_start, cur_length, current_word)
-        original_word[buffer_ptr] = current_word
-        current_suggestion_index[buffer_ptr] = -1
-        suggestion_active[buffer_ptr] = False
-        
-        # Podświetl błędne słowo
-        color = weechat.color(weechat.config_get_plugin("word_color") or "red")
-        highlighted_word = f"{color}{current_word}{weechat.color('reset')}"
-        
-        # Sugestie w nawiasach kwadratowych
-        visible_suggs = suggestions[:5]
-        bracket_text = " [" + ", ".join(visible_suggs) + "]"
-        new_string = (string[:cur_start] +
-                      highlighted_word +
-                      bracket_text +
-                      string[cur_start + cur_length:])
-        return new_string
+        # Słowo pod kursorem zostało już sprawdzone - użyj zapamiętanego wyniku
+        if st and st.orig_word == current_word:
+            if not st.suggestions:
+                return string
+            return _render_with_suggestions(string, st)
+
+        # Sprawdzenie odkładamy do przerwy w pisaniu (check_timer_cb odświeży input)
+        states.pop(buffer_ptr, None)
+        _schedule_check(buffer_ptr)
+        return string
 
 def tab_key_cb(data, buffer, command):
     """
     Obsługa TAB:
       - Zwiększa indeks aktualnej sugestii (iteruje tylko po dostępnych propozycjach).
       - Natychmiast podmienia błędne słowo w polu input na wybraną sugestię.
-      - Aktualizuje last_word_position, aby nowy zakres odpowiadał długości wstawionego słowa.
+      - Aktualizuje długość słowa w stanie bufora, aby odpowiadała wstawionej sugestii.
     """
     buffer_ptr = str(buffer)
     
-    if buffer_ptr not in last_suggestions or not last_suggestions[buffer_ptr]:
-        return weechat.WEECHAT_RC_OK
-
-    suggestions = last_suggestions[buffer_ptr]
-    suggestion_active[buffer_ptr] = True
+    # TAB przed upływem opóźnienia - sprawdź słowo od razu
+    if buffer_ptr in _pending_timer:
+        _run_check(buffer_ptr)
 
-    if buffer_ptr not in current_suggestion_index:
-        current_suggestion_index[buffer_ptr] = -1
-    current_idx = current_suggestion_index[buffer_ptr]
-    new_idx = (current_idx + 1) % len(suggestions)
-    current_suggestion_index[buffer_ptr] = new_idx
+    st = states.get(buffer_ptr)
+    if not st or not st.suggestions:
+        return weechat.WEECHAT_RC_OK
 
-    chosen = suggestions[new_idx]
+    st.active = True
+    st.idx = (st.idx + 1) % len(st.suggestions)
+    chosen = st.suggestions[st.idx]
 
     input_text = weechat.buffer_get_string(buffer, "input")
-    if buffer_ptr not in last_word_position:
-        return weechat.WEECHAT_RC_OK
-        
-    word_start, word_length, _ = last_word_position[buffer_ptr]
-    new_input = input_text[:word_start] + chosen + input_text[word_start + word_length:]
+    word_start = st.word_start
+    new_input = "".join((input_text[:word_start], chosen, input_text[word_start + st.word_length:]))
+    
+    # Aktualizujemy zakres wybranego słowa przed zmianą inputu, aby iteracje pracowały poprawnie
+    # (WeeChat odświeża wyświetlany input później, w pętli głównej - już ze spójnym stanem)
+    st.word_length = len(chosen)
+    _last_render.pop(buffer_ptr, None)
     weechat.buffer_set(buffer, "input", new_input)
     weechat.buffer_set(buffer, "input_pos", str(word_start + len(chosen)))
-    
-    # Aktualizujemy zakres wybranego słowa, aby iteracje pracowały poprawnie:
-    last_word_position[buffer_ptr] = (word_start, len(chosen), original_word[buffer_ptr])
     return weechat.WEECHAT_RC_OK_EAT
 
 def space_key_cb(data, buffer, command):
     """
     Obsługa SPACJI:
-      - Jeśli suggestion_active == True, SPACJA dodaje spację na końcu i resetuje stan.
+      - Jeśli stan bufora jest aktywny, SPACJA dodaje spację na końcu i resetuje stan.
       - Jeśli nie, działa normalnie (przekazuje spację do wejścia).
     """
     buffer_ptr = str(buffer)
     
-    if not suggestion_active.get(buffer_ptr, False):
+    st = states.get(buffer_ptr)
+    if not st or not st.active:
         return weechat.WEECHAT_RC_OK
 
-    # Jeśli suggestion_active jest True, SPACJA dodaje spację i resetuje stan.
+    # Jeśli stan jest aktywny, SPACJA dodaje spację i resetuje stan.
     input_text = weechat.buffer_get_string(buffer, "input")
     new_input = input_text + " "
     weechat.buffer_set(buffer, "input", new_input)
     weechat.buffer_set(buffer, "input_pos", str(len(input_text) + 1))
     
-    for dct in (last_suggestions, current_suggestion_index, last_word_position, original_word, suggestion_active):
-        dct.pop(buffer_ptr, None)
+    states.pop(buffer_ptr, None)
+    _last_render.pop(buffer_ptr, None)
     return weechat.WEECHAT_RC_OK_EAT
 
 def other_key_cb(data, buffer, command):
     """
-    Obsługa innych klawiszy – resetuje stan, jeśli suggestion_active.
+    Obsługa innych klawiszy – resetuje stan, jeśli jest aktywny.
     """
     buffer_ptr = str(buffer)
-    if not suggestion_active.get(buffer_ptr, False):
+    st = states.get(buffer_ptr)
+    if not st or not st.active:
         return weechat.WEECHAT_RC_OK
         
-    for dct in (last_suggestions, current_suggestion_index, last_word_position, original_word, suggestion_active):
-        dct.pop(buffer_ptr, None)
+    states.pop(buffer_ptr, None)
+    _last_render.pop(buffer_ptr, None)
+    return weechat.WEECHAT_RC_OK
+
+def input_command_cb(data, buffer, command):
+    """Przekazuje komendę /input do obsługi TAB, SPACJI lub klawiszy resetujących stan."""
+    action = command[len("/input "):]
+    if action == "complete_next":
+        return tab_key_cb(data, buffer, command)
+    if action == "insert ' '":
+        return space_key_cb(data, buffer, command)
+    if action in _RESET_ACTIONS or action.startswith(_RESET_PREFIXES):
+        return other_key_cb(data, buffer, command)
+    return weechat.WEECHAT_RC_OK
+
+def refresh_colors():
+    """Odświeża zapamiętane kody kolorów."""
+    _COLOR["word"] = weechat.color(weechat.config_get_plugin("word_color") or "red")
+    _COLOR["reset"] = weechat.color("reset")
+    _COLOR["magenta"] = weechat.color("magenta")
+    # Zapamiętane nawiasy z sugestiami zawierają stare kody kolorów
+    for st in states.values():
+        st.bracket_cache = None
+    _last_render.clear()
+
+def config_cb(data, option, value):
+    """Obsługa zmian konfiguracji."""
+    global _DEBUG
+    
+    name = option.rsplit(".", 1)[-1]
+    if name == "debug_mode":
+        _DEBUG = value == "1"
+    if name == "word_color":
+        refresh_colors()
     return weechat.WEECHAT_RC_OK
 
 def main():
+    global _DEBUG
+    
     if not weechat.register(SCRIPT_NAME, SCRIPT_AUTHOR, SCRIPT_VERSION, SCRIPT_LICENSE, SCRIPT_DESC, "", ""):
         return
 
@@ -290,19 +460,15 @@ def main():
         if not weechat.config_is_set_plugin(option):
             weechat.config_set_plugin(option, value)
 
+    refresh_colors()
+    _DEBUG = weechat.config_get_plugin("debug_mode") == "1"
+    weechat.hook_config("plugins.var.python." + SCRIPT_NAME + ".*", "config_cb", "")
+    threading.Thread(target=_prewarm, daemon=True).start()
     weechat.hook_modifier("input_text_display", "input_modifier_cb", "")
-    weechat.hook_command_run("/input complete_next", "tab_key_cb", "")
-    weechat.hook_command_run("/input insert ' '", "space_key_cb", "")
-
-    # Hooki dla innych klawiszy, które powinny resetować stan sugestii:
-    weechat.hook_command_run("/input delete_*", "other_key_cb", "")
-    weechat.hook_command_run("/input move_*", "other_key_cb", "")
-    weechat.hook_command_run("/input history_*", "other_key_cb", "")
-    weechat.hook_command_run("/input return", "other_key_cb", "")
-    weechat.hook_command_run("/input search_*", "other_key_cb", "")
-    weechat.hook_command_run("/input transpose_chars", "other_key_cb", "")
-    weechat.hook_command_run("/input undo", "other_key_cb", "")
-    weechat.hook_command_run("/input redo", "other_key_cb", "")
+    weechat.hook_signal("nicklist_nick_*", "nicklist_signal_cb", "")
+    weechat.hook_signal("buffer_closing", "buffer_closing_cb", "")
+    # Jeden hook na wszystkie komendy /input (TAB, SPACJA i klawisze resetujące stan)
+    weechat.hook_command_run("/input *", "input_command_cb", "")
 
     weechat.prnt("", f"{SCRIPT_NAME} v{SCRIPT_VERSION} załadowany.")
     weechat.prnt("", "TAB: natychmiast podmienia błędne słowo na kolejną sugestię (max 5 propozycji).")